@@ -1,6 +1,6 @@
 {
     'name': 'Importación de Operaciones Bancarias',
-    'version': '18.0.1.0.0',
+    'version': '18.0.1.1.0',
     'category': 'Accounting',
     'summary': 'Importar y procesar archivos bancarios TXT y Excel',
     'description': '''
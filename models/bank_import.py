@@ -1,13 +1,156 @@
 import base64
 import csv
 import io
-from datetime import datetime
-from odoo import models, fields, api, _
+import json
+from collections import defaultdict
+from datetime import date, datetime
+from psycopg2.extras import execute_values
+from odoo import models, fields, api, tools, _
 from odoo.exceptions import UserError, ValidationError
+from odoo.osv import expression
+from odoo.tools import split_every, sql
 import logging
+import re
+
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+try:
+    import xlrd
+except ImportError:
+    xlrd = None
 
 _logger = logging.getLogger(__name__)
 
+# Palabras clave de los headers Excel por rol, en orden de prioridad
+_HEADER_KEYWORDS = (
+    ('date', ('fecha', 'date', 'dia')),
+    ('description', ('descripcion', 'concepto', 'detalle', 'description', 'memo', 'glosa', 'trans')),
+    ('cargo', ('cargo', 'debe', 'debito')),
+    ('abono', ('abono', 'haber', 'credito')),
+    ('operation', ('documento', 'nro', 'numero', 'referencia', 'reference', 'operation')),
+)
+_HEADER_ROLES = tuple(role for role, _keywords in _HEADER_KEYWORDS)
+# Palabra exacta -> rol; el regex solo se usa para palabras que contienen una clave (p. ej. "transaccion")
+_HEADER_KEYWORD_ROLES = {keyword: role for role, keywords in _HEADER_KEYWORDS for keyword in keywords}
+_HEADER_RE = re.compile('|'.join(f"(?P<{role}>{'|'.join(keywords)})" for role, keywords in _HEADER_KEYWORDS))
+_HEADER_WORD_RE = re.compile(r'\w+')
+
+# Caracteres a eliminar de los montos (separador de miles, moneda y espacios) en una sola pasada
+_AMOUNT_TRANS = str.maketrans('', '', ',$ \t\r\n\xa0')
+# Escape de los comodines de LIKE/ILIKE en una sola pasada
+_LIKE_ESCAPE_TRANS = str.maketrans({'\\': '\\\\', '%': '\\%', '_': '\\_'})
+
+# Formatos de fecha aceptados en columnas de texto del Excel, en orden de prueba
+_DATE_FORMATS = ('%Y.%m.%d', '%d/%m/%Y', '%Y-%m-%d', '%d-%m-%Y', '%m/%d/%Y')
+# Descarta sin strptime los textos que no pueden ser una fecha de _DATE_FORMATS
+_DATE_RE = re.compile(r'\d{1,4}[./-]\d{1,2}[./-]\d{1,4}$')
+
+# Fechas del Continental: DD-MM (año implícito), DD-MM-YYYY / DD/MM/YYYY y YYYY-MM-DD
+_CONTINENTAL_DATE_RE = re.compile(r'(\d{1,2})\s*[-/]\s*(\d{1,2})(?:[-/](\d{4}|\d{2}))?')
+_CONTINENTAL_ISO_DATE_RE = re.compile(r'(\d{4})-(\d{1,2})-(\d{1,2})')
+
+# Firmas de archivo: .xlsx (zip) y .xls (documento OLE)
+_XLSX_MAGIC = b'PK\x03\x04'
+_XLS_MAGIC = b'\xd0\xcf\x11\xe0'
+
+# Cantidad mínima de campos de una transacción en los TXT bancarios
+_TXT_FIELD_MIN = 6
+_LINE_CREATE_BATCH = 1000
+
+# Estados de account.payment que se consideran para el emparejamiento
+_ACTIVE_PAYMENT_STATES = ('posted', 'sent', 'in_process')
+_AMOUNT_TOLERANCE = 0.01  # 1 centavo de tolerancia
+_MATCH_SQL_THRESHOLD = 500
+_MATCH_BLOCK_SIZE = 256
+
+# Contexto para operaciones masivas: sin tracking ni mensajes de chatter
+_BULK_CTX = {
+    'tracking_disable': True,
+    'mail_create_nolog': True,
+    'mail_notrack': True,
+    'prefetch_fields': False,
+}
+
+
+def _set_operation_values(payment_rows, op_fields):
+    """Normalizar una sola vez los campos de operación de cada pago leído
+    
+    ``op_text`` son los campos con strip() unidos por NUL, que no puede aparecer en un texto
+    de PostgreSQL, y ``op_keys`` el conjunto de sus formas sin ceros a la izquierda y de sus
+    últimos 6 dígitos (BCP), con y sin ceros.
+    """
+    for row in payment_rows:
+        values = tuple(str(row[f]).strip() for f in op_fields if row[f])
+        keys = set()
+        for value in values:
+            keys.add(value.lstrip('0') or '0')
+            if len(value) >= 6:
+                keys.add(value[-6:])
+                keys.add(value[-6:].lstrip('0'))
+        row['op_text'] = '\x00'.join(values)
+        row['op_keys'] = keys
+    return payment_rows
+
+
+def _escape_like(value):
+    """Escapar los comodines de LIKE/ILIKE"""
+    return value.translate(_LIKE_ESCAPE_TRANS)
+
+
+def _fast_ddmmyyyy(value):
+    """Parsear una fecha DD/MM/YYYY sin strptime; devuelve None si no tiene ese formato"""
+    if len(value) != 10 or value[2] != '/' or value[5] != '/':
+        return None
+    try:
+        return date(int(value[6:10]), int(value[3:5]), int(value[0:2]))
+    except ValueError:
+        return None
+
+
+def _cell_amount(value):
+    """Monto de una celda: los números se usan tal cual y el texto se limpia con _AMOUNT_TRANS
+    
+    Devuelve None si la celda no contiene un número.
+    """
+    if isinstance(value, (int, float)):
+        return float(value)
+    amount_str = str(value).translate(_AMOUNT_TRANS)
+    if not amount_str:
+        return None
+    try:
+        return float(amount_str)
+    except ValueError:
+        return None
+
+
+def _parse_date_str(value, format_cache, column):
+    """Parsear una fecha de texto probando primero el último formato que funcionó en la columna
+    
+    ``format_cache`` es un diccionario {columna: formato} compartido por todas las filas.
+    """
+    value = value.strip()
+    if not _DATE_RE.match(value):
+        return None
+    cached_fmt = format_cache.get(column)
+    if cached_fmt:
+        try:
+            return datetime.strptime(value, cached_fmt).date()
+        except ValueError:
+            pass
+    for fmt in _DATE_FORMATS:
+        if fmt == cached_fmt:
+            continue
+        try:
+            result = datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+        format_cache[column] = fmt
+        return result
+    return None
+
 
 class BankImport(models.Model):
     _name = 'bank.import'
@@ -43,24 +186,57 @@ class BankImport(models.Model):
     matched_operations = fields.Integer('Operaciones Emparejadas', compute='_compute_totals')
     unmatched_operations = fields.Integer('Operaciones Sin Emparejar', compute='_compute_totals')
 
+    def init(self):
+        """Índices en account.payment para el emparejamiento
+
+        Un B-tree (state, amount) para la búsqueda de candidatos por rango de monto, un B-tree
+        por cada campo de operación sin índice propio (búsqueda exacta con IN) y, si pg_trgm
+        está disponible, índices trigram en esos campos (búsqueda con ILIKE). Se ejecuta al
+        instalar y al actualizar el módulo; create_index no hace nada si el índice ya existe.
+        """
+        Payment = self.env['account.payment']
+        sql.create_index(
+            self.env.cr,
+            'account_payment_state_amount_bank_import_idx',
+            Payment._table,
+            ['"state"', '"amount"'],
+        )
+        op_fields = self._payment_operation_fields()
+        for field in op_fields:
+            if not Payment._fields[field].index:
+                sql.create_index(
+                    self.env.cr,
+                    f'account_payment_{field}_bank_import_idx',
+                    Payment._table,
+                    [f'"{field}"'],
+                )
+        if not self.env.registry.has_trigram:
+            return
+        for field in op_fields:
+            sql.create_index(
+                self.env.cr,
+                f'account_payment_{field}_bank_import_trgm_idx',
+                Payment._table,
+                [f'"{field}" gin_trgm_ops'],
+                method='gin',
+            )
+
     @api.depends('file_name')
     def _compute_file_type(self):
         for record in self:
-            if record.file_name:
-                if record.file_name.lower().endswith('.txt'):
-                    record.file_type = 'txt'
-                elif record.file_name.lower().endswith(('.xls', '.xlsx')):
-                    record.file_type = 'excel'
-                else:
-                    record.file_type = 'txt'
-            else:
-                record.file_type = 'txt'
+            # Solo importa la extensión: basta con los últimos 5 caracteres
+            extension = (record.file_name or '')[-5:].lower()
+            record.file_type = 'excel' if extension.endswith(('.xls', '.xlsx')) else 'txt'
 
     @api.depends('line_ids', 'matched_payment_ids')
     def _compute_totals(self):
+        # Un COUNT agrupado por modelo para todos los registros, sin cargar los One2many
+        domain = [('import_id', 'in', self._origin.ids)]
+        line_counts = {imp.id: count for imp, count in self.env['bank.import.line']._read_group(domain, ['import_id'], ['__count'])}
+        match_counts = {imp.id: count for imp, count in self.env['bank.import.match']._read_group(domain, ['import_id'], ['__count'])}
         for record in self:
-            record.total_operations = len(record.line_ids)
-            record.matched_operations = len(record.matched_payment_ids)
+            record.total_operations = line_counts.get(record._origin.id, 0)
+            record.matched_operations = match_counts.get(record._origin.id, 0)
             record.unmatched_operations = record.total_operations - record.matched_operations
 
     def action_process_file(self):
@@ -73,7 +249,7 @@ class BankImport(models.Model):
         _logger.info(f"Nombre del archivo: {self.file_name}")
         _logger.info(f"Banco: {self.bank_type}")
         
-        self.line_ids.unlink()  # Limpiar líneas anteriores
+        self._delete_previous_lines()
         
         try:
             if self.file_type == 'txt':
@@ -83,14 +259,17 @@ class BankImport(models.Model):
                 _logger.info("Procesando archivo Excel...")
                 self._process_excel_file()
             
-            lines_count = len(self.line_ids)
+            lines_count = self.env['bank.import.line'].search_count([('import_id', '=', self.id)])
             _logger.info(f"=== PROCESAMIENTO COMPLETADO: {lines_count} líneas creadas ===")
             
             if lines_count == 0:
                 raise UserError(_('No se pudieron extraer datos del archivo. Verifique que el archivo tenga el formato correcto y contenga datos.'))
             
-            self.state = 'processed'
-            self.name = f"Importación {self.bank_type.upper()} - {fields.Datetime.now().strftime('%d/%m/%Y %H:%M')}"
+            now = fields.Datetime.now()
+            self.write({
+                'state': 'processed',
+                'name': f"Importación {self.bank_type.upper()} - {now.strftime('%d/%m/%Y %H:%M')}",
+            })
             
             return {
                 'type': 'ir.actions.client',
@@ -107,173 +286,154 @@ class BankImport(models.Model):
             _logger.error(f"=== ERROR EN PROCESAMIENTO: {str(e)} ===")
             raise
 
+    def _delete_previous_lines(self):
+        """Borrar las líneas y emparejamientos anteriores con un DELETE por tabla en lugar de unlink()"""
+        Line = self.env['bank.import.line']
+        Match = self.env['bank.import.match']
+        Line.flush_model()
+        Match.flush_model()
+        self.env.cr.execute("DELETE FROM bank_import_match WHERE import_id = %s", (self.id,))
+        self.env.cr.execute("DELETE FROM bank_import_line WHERE import_id = %s", (self.id,))
+        # El DELETE no pasa por el ORM: invalidar la caché de ambos modelos y de los One2many
+        Match.invalidate_model()
+        Line.invalidate_model()
+        self.invalidate_recordset(['line_ids', 'matched_payment_ids'])
+
+    def _decoded_bytes(self):
+        """Decodificar una sola vez el contenido base64 del archivo"""
+        return base64.b64decode(self.file_data or b'')
+
     def _process_txt_file(self):
         """Procesar archivo TXT del banco"""
         try:
-            file_content = base64.b64decode(self.file_data).decode('utf-8')
-            lines = file_content.split('\n')
+            # El texto se decodifica por bloques mientras csv.reader avanza, sin una copia
+            # completa del archivo como str; newline='' deja los saltos de línea a csv.reader
+            stream = io.TextIOWrapper(io.BytesIO(self._decoded_bytes()), encoding='utf-8', errors='replace', newline='')
+            # Las líneas físicas que consume csv.reader se guardan para conservar el texto
+            # original de cada registro (un campo entre comillas puede contener ';')
+            record_lines = []
+            
+            def track_lines(lines):
+                for line in lines:
+                    record_lines.append(line)
+                    yield line
+            
+            # skipinitialspace: un campo '; "texto"' también se entrega sin comillas
+            reader = csv.reader(track_lines(stream), delimiter=';', quotechar='"', skipinitialspace=True)
             
             _logger.info(f"Procesando archivo TXT para banco: {self.bank_type}")
             
-            # Buscar líneas de transacciones (que empiecen con fecha)
-            transaction_lines = []
-            for line in lines:
-                if line.strip() and line.startswith('"') and self._is_transaction_line(line):
-                    transaction_lines.append(line)
+            # El banco se resuelve una vez: cada parser lleva su lógica sin condicionales por fila
+            if self.bank_type == 'bcp':
+                parse_one = self._parse_txt_transaction_bcp
+            else:
+                parse_one = self._parse_txt_transaction_generic
+            
+            # Solo son transacciones las filas con al menos _TXT_FIELD_MIN campos que empiezan con fecha DD/MM/YYYY;
+            # csv.reader ya entrega los campos sin comillas, se parsean una sola vez
+            vals_list = []
+            for row in reader:
+                record = ''.join(record_lines)
+                record_lines.clear()
+                if len(row) < _TXT_FIELD_MIN:
+                    continue
+                transaction_date = _fast_ddmmyyyy(row[0].strip())
+                if not transaction_date:
+                    continue
+                vals = parse_one(row, transaction_date, record.rstrip('\r\n'))
+                if vals:
+                    vals_list.append(vals)
             
-            _logger.info(f"Encontradas {len(transaction_lines)} líneas de transacciones")
+            _logger.info("Encontradas %s líneas de transacciones", len(vals_list))
+            if self.bank_type == 'bcp':
+                _logger.info("BCP: Números de operación ajustados a los últimos 6 dígitos")
             
-            for line in transaction_lines:
-                self._parse_txt_transaction(line)
+            self._create_import_lines(vals_list)
                 
         except Exception as e:
             _logger.error(f"Error procesando archivo TXT: {str(e)}")
             raise UserError(_('Error al procesar el archivo TXT: %s') % str(e))
 
-    def _is_transaction_line(self, line):
-        """Verificar si una línea es una transacción válida"""
-        try:
-            # Dividir por punto y coma y verificar formato de fecha
-            fields = [field.strip('"') for field in line.split(';')]
-            if len(fields) >= 6:
-                date_str = fields[0]
-                # Verificar formato de fecha DD/MM/YYYY
-                datetime.strptime(date_str, '%d/%m/%Y')
-                return True
-        except:
-            pass
-        return False
+    def _create_import_lines(self, vals_list):
+        """Crear las líneas de importación con create por lotes de _LINE_CREATE_BATCH
+        
+        Los parsers no incluyen ``import_id`` en cada fila: se asigna aquí una sola vez.
+        """
+        import_id = self.id
+        ImportLine = self.env['bank.import.line'].with_context(**_BULK_CTX)
+        lines = ImportLine
+        for batch in split_every(_LINE_CREATE_BATCH, vals_list, list):
+            for vals in batch:
+                vals['import_id'] = import_id
+            lines |= ImportLine.create(batch)
+            # Liberar la caché del ORM entre lotes para acotar la memoria
+            ImportLine.flush_model()
+            ImportLine.invalidate_model()
+        return lines
 
-    def _parse_txt_transaction(self, line):
-        """Parsear una línea de transacción del TXT"""
+    def _parse_txt_transaction_generic(self, row, transaction_date, original_line):
+        """Construir los valores de línea a partir de los campos ya separados de una transacción TXT
+        
+        ``original_line`` es el texto del registro tal como venía en el archivo.
+        """
         try:
-            fields = [field.strip('"').strip() for field in line.split(';')]
+            description = row[2].strip()
+            amount_str = row[3].translate(_AMOUNT_TRANS)
+            operation_number = row[5].strip()
             
-            if len(fields) >= 6:
-                date_str = fields[0]
-                description = fields[2]
-                amount_str = fields[3].replace(',', '')
-                operation_number = fields[5]
-                
-                # Convertir fecha
-                transaction_date = datetime.strptime(date_str, '%d/%m/%Y').date()
-                
-                # Convertir monto
-                try:
-                    amount = float(amount_str)
-                except ValueError:
-                    amount = 0.0
-                
-                # Para BCP: Solo tomar los últimos 6 dígitos del número de operación
-                if self.bank_type == 'bcp' and operation_number and len(operation_number) >= 6:
-                    operation_number = operation_number[-6:]
-                    _logger.info(f"BCP: Número de operación ajustado a últimos 6 dígitos: {operation_number}")
-                
-                # Crear línea de importación
-                self.env['bank.import.line'].create({
-                    'import_id': self.id,
-                    'transaction_date': transaction_date,
-                    'description': description,
-                    'amount': amount,
-                    'operation_number': operation_number,
-                    'original_line': line
-                })
+            # Convertir monto
+            try:
+                amount = float(amount_str)
+            except ValueError:
+                amount = 0.0
+            
+            return {
+                'transaction_date': transaction_date,
+                'description': description,
+                'amount': amount,
+                'operation_number': operation_number,
+                'original_line': original_line
+            }
                 
         except Exception as e:
-            _logger.error(f"Error parseando línea TXT: {str(e)}")
+            _logger.error("Error parseando línea TXT: %s", e)
+        return None
+
+    def _parse_txt_transaction_bcp(self, row, transaction_date, original_line):
+        """Parsear una transacción TXT del BCP: solo se toman los últimos 6 dígitos del número de operación"""
+        vals = self._parse_txt_transaction_generic(row, transaction_date, original_line)
+        if vals:
+            vals['operation_number'] = vals['operation_number'][-6:]
+        return vals
 
     def _process_excel_file(self):
         """Procesar archivo Excel del Banco de la Nación"""
         try:
-            file_content = base64.b64decode(self.file_data)
+            file_content = self._decoded_bytes()
             _logger.info(f"Procesando archivo Excel de {len(file_content)} bytes")
             
-            # Verificar qué librerías están disponibles
-            openpyxl_available = False
-            xlrd_available = False
-            
-            try:
-                import openpyxl
-                openpyxl_available = True
-                _logger.info(f"Librería openpyxl {openpyxl.__version__} disponible")
-            except ImportError as e:
-                _logger.warning(f"Librería openpyxl no disponible: {e}")
-            
-            try:
-                import xlrd
-                xlrd_available = True
-                _logger.info(f"Librería xlrd {xlrd.__version__} disponible")
-            except ImportError as e:
-                _logger.warning(f"Librería xlrd no disponible: {e}")
-            
-            if not openpyxl_available and not xlrd_available:
+            if openpyxl is None and xlrd is None:
                 raise UserError(_('No se encontraron librerías para procesar archivos Excel.'))
             
-            success = False
-            last_error = None
+            # Elegir el parser por la firma del archivo: .xlsx es un zip (PK) y .xls un
+            # documento OLE; así nunca se intenta abrir un formato con la librería del otro
+            if file_content.startswith(_XLSX_MAGIC):
+                name, library, method = 'openpyxl', openpyxl, self._process_excel_openpyxl
+            elif file_content.startswith(_XLS_MAGIC):
+                name, library, method = 'xlrd', xlrd, self._process_excel_xlrd
+            else:
+                raise UserError(_('El archivo no es un Excel válido (.xlsx o .xls). Verifique que el archivo no esté corrupto.'))
             
-            # Intentar con openpyxl primero (para .xlsx)
-            if openpyxl_available:
-                try:
-                    import openpyxl
-                    _logger.info("Intentando procesar con openpyxl...")
-                    workbook = openpyxl.load_workbook(io.BytesIO(file_content), read_only=True, data_only=True)
-                    sheet = workbook.active
-                    _logger.info(f"Archivo Excel procesado con openpyxl. Hoja activa: {sheet.title}, Filas: {sheet.max_row}, Columnas: {sheet.max_column}")
-                    
-                    if sheet.max_row < 2:
-                        raise UserError(_('El archivo Excel está vacío o no contiene datos suficientes.'))
-                    
-                    self._parse_excel_openpyxl(sheet)
-                    success = True
-                    _logger.info("Procesamiento con openpyxl exitoso")
-                    
-                except Exception as e:
-                    last_error = str(e)
-                    _logger.warning(f"Error con openpyxl: {last_error}")
-                    if "not a zip file" in last_error.lower() or "invalid" in last_error.lower():
-                        # Es probable que sea un archivo .xls, intentar con xlrd
-                        pass
-                    elif not xlrd_available:
-                        raise UserError(_('Error procesando archivo Excel: %s\n\nVerifique que el archivo no esté corrupto.') % last_error)
-            
-            # Intentar con xlrd para archivos .xls
-            if not success and xlrd_available:
-                try:
-                    import xlrd
-                    _logger.info("Intentando procesar con xlrd...")
-                    workbook = xlrd.open_workbook(file_contents=file_content)
-                    
-                    # Para Continental, buscar la hoja Sheet6 específicamente
-                    if self.bank_type == 'continental':
-                        sheet = None
-                        for sheet_name in workbook.sheet_names():
-                            if 'Sheet6' in sheet_name:
-                                sheet = workbook.sheet_by_name(sheet_name)
-                                break
-                        if not sheet:
-                            sheet = workbook.sheet_by_index(0)
-                    else:
-                        sheet = workbook.sheet_by_index(0)
-                    _logger.info(f"Archivo Excel procesado con xlrd. Hoja: {sheet.name}, Filas: {sheet.nrows}, Columnas: {sheet.ncols}")
-                    
-                    if sheet.nrows < 2:
-                        raise UserError(_('El archivo Excel está vacío o no contiene datos suficientes.'))
-                    
-                    self._parse_excel_xlrd(sheet)
-                    success = True
-                    _logger.info("Procesamiento con xlrd exitoso")
-                    
-                except Exception as e:
-                    last_error = str(e)
-                    _logger.error(f"Error con xlrd: {last_error}")
-            
-            if not success:
-                error_msg = _('No se pudo procesar el archivo Excel.')
-                if last_error:
-                    error_msg += f'\n\nÚltimo error: {last_error}'
-                error_msg += _('\n\nVerifique que:\n- El archivo no esté corrupto\n- El archivo tenga extensión .xlsx o .xls\n- El archivo contenga datos válidos')
-                raise UserError(error_msg)
+            if library is None:
+                raise UserError(_('La librería %s necesaria para este archivo no está instalada.') % name)
+            
+            try:
+                method(file_content)
+            except UserError:
+                raise
+            except Exception as e:
+                _logger.warning("Error con %s: %s", name, e)
+                raise UserError(_('Error procesando archivo Excel: %s\n\nVerifique que el archivo no esté corrupto.') % str(e))
                 
         except UserError:
             raise  # Re-raise UserError tal como está
@@ -281,6 +441,52 @@ class BankImport(models.Model):
             _logger.error(f"Error inesperado procesando archivo Excel: {str(e)}")
             raise UserError(_('Error inesperado al procesar el archivo Excel: %s') % str(e))
 
+    def _process_excel_openpyxl(self, file_content):
+        """Procesar archivo Excel (.xlsx) con openpyxl"""
+        _logger.info("Intentando procesar con openpyxl...")
+        workbook = openpyxl.load_workbook(
+            io.BytesIO(file_content), read_only=True, data_only=True, keep_links=False, keep_vba=False,
+        )
+        try:
+            sheet = workbook.active
+            _logger.info(f"Archivo Excel procesado con openpyxl. Hoja activa: {sheet.title}, Filas: {sheet.max_row}, Columnas: {sheet.max_column}")
+            
+            if sheet.max_row < 2:
+                raise UserError(_('El archivo Excel está vacío o no contiene datos suficientes.'))
+            
+            self._parse_excel_openpyxl(sheet)
+            _logger.info("Procesamiento con openpyxl exitoso")
+        finally:
+            # En modo read_only el libro mantiene abierto el zip hasta cerrarlo
+            workbook.close()
+
+    def _process_excel_xlrd(self, file_content):
+        """Procesar archivo Excel (.xls) con xlrd"""
+        _logger.info("Intentando procesar con xlrd...")
+        # on_demand: solo se carga la hoja que se va a procesar
+        workbook = xlrd.open_workbook(file_contents=file_content, on_demand=True)
+        try:
+            # Para Continental, buscar la hoja Sheet6 específicamente
+            if self.bank_type == 'continental':
+                sheet = None
+                for sheet_name in workbook.sheet_names():
+                    if 'Sheet6' in sheet_name:
+                        sheet = workbook.sheet_by_name(sheet_name)
+                        break
+                if not sheet:
+                    sheet = workbook.sheet_by_index(0)
+            else:
+                sheet = workbook.sheet_by_index(0)
+            _logger.info(f"Archivo Excel procesado con xlrd. Hoja: {sheet.name}, Filas: {sheet.nrows}, Columnas: {sheet.ncols}")
+            
+            if sheet.nrows < 2:
+                raise UserError(_('El archivo Excel está vacío o no contiene datos suficientes.'))
+            
+            self._parse_excel_xlrd(sheet)
+            _logger.info("Procesamiento con xlrd exitoso")
+        finally:
+            workbook.release_resources()
+
     def _parse_excel_openpyxl(self, sheet):
         """Parsear Excel con openpyxl"""
         _logger.info("Iniciando parseado con openpyxl...")
@@ -289,46 +495,46 @@ class BankImport(models.Model):
         if self.bank_type == 'continental':
             return self._parse_continental_excel_openpyxl(sheet)
 
-        # Buscar header row
+        # Buscar header row (iter_rows con values_only evita crear objetos Cell);
+        # se corta en la primera celda con "fecha" sin construir listas por fila
         header_row = None
-        for row_num in range(1, min(10, sheet.max_row + 1)):
-            row = sheet[row_num]
-            row_values = [str(cell.value).lower() if cell.value else '' for cell in row]
-            _logger.info(f"Fila {row_num}: {row_values}")
-            
-            if any('fecha' in value for value in row_values):
+        headers = []
+        for row_num, row in enumerate(sheet.iter_rows(min_row=1, max_row=9, values_only=True), 1):
+            if any(value and 'fecha' in str(value).lower() for value in row):
                 header_row = row_num
-                _logger.info(f"Header encontrado en fila {row_num}")
+                headers = [str(value).lower().strip() if value else '' for value in row]
+                _logger.info("Header encontrado en fila %s", row_num)
                 break
         
         if not header_row:
             raise UserError(_('No se encontró la fila de encabezados en el archivo Excel. Verifique que haya una columna con "fecha".'))
         
-        # Obtener headers
-        headers = [str(cell.value).lower().strip() if cell.value else '' for cell in sheet[header_row]]
-        _logger.info(f"Headers encontrados: {headers}")
+        _logger.info("Headers encontrados: %s", headers)
         
         # Mapear columnas
         col_mapping = self._get_excel_column_mapping(headers)
-        _logger.info(f"Mapeo de columnas: {col_mapping}")
+        _logger.info("Mapeo de columnas: %s", col_mapping)
         
         if not col_mapping:
             raise UserError(_('No se pudieron mapear las columnas del Excel. Verifique que contenga las columnas necesarias (fecha, descripción, monto, operación).'))
         
-        # Procesar datos
-        lines_created = 0
-        for row_num in range(header_row + 1, sheet.max_row + 1):
-            row = sheet[row_num]
-            if not any(cell.value for cell in row):
+        # Procesar datos: solo se leen las columnas hasta la última mapeada
+        last_col = max(col_mapping.values()) + 1
+        vals_list = []
+        date_format_cache = {}
+        for row_num, row in enumerate(sheet.iter_rows(min_row=header_row + 1, max_col=last_col, values_only=True), header_row + 1):
+            if not any(row):
                 continue
             
             try:
-                self._create_excel_import_line(row, col_mapping, 'openpyxl')
-                lines_created += 1
+                line_vals = self._build_excel_import_line_vals(row, col_mapping, 'openpyxl', date_format_cache)
+                if line_vals:
+                    vals_list.append(line_vals)
             except Exception as e:
-                _logger.warning(f"Error procesando fila {row_num}: {str(e)}")
-                
-        _logger.info(f"Se crearon {lines_created} líneas desde Excel")
+                _logger.warning("Error procesando fila %s: %s", row_num, e)
+        
+        lines_created = len(self._create_import_lines(vals_list))
+        _logger.info("Se crearon %s líneas desde Excel", lines_created)
         
         if lines_created == 0:
             raise UserError(_('No se pudieron extraer datos del archivo Excel. Verifique el formato de los datos.'))
@@ -342,46 +548,47 @@ class BankImport(models.Model):
             return self._parse_continental_excel_xlrd(sheet)
         
         # Lógica original para otros bancos (Banco de la Nación)
-        # Buscar header row
+        # Buscar header row, cortando en la primera celda con "fecha"
         header_row = None
+        headers = []
         for row_num in range(min(10, sheet.nrows)):
             row = sheet.row_values(row_num)
-            row_values = [str(cell).lower() for cell in row]
-            _logger.info(f"Fila {row_num}: {row_values}")
-            
-            if any('fecha' in value for value in row_values):
+            if any('fecha' in str(cell).lower() for cell in row):
                 header_row = row_num
-                _logger.info(f"Header encontrado en fila {row_num}")
+                headers = [str(cell).lower().strip() for cell in row]
+                _logger.info("Header encontrado en fila %s", row_num)
                 break
         
         if header_row is None:
             raise UserError(_('No se encontró la fila de encabezados en el archivo Excel. Verifique que haya una columna con "fecha".'))
         
-        # Obtener headers
-        headers = [str(cell).lower().strip() for cell in sheet.row_values(header_row)]
-        _logger.info(f"Headers encontrados: {headers}")
+        _logger.info("Headers encontrados: %s", headers)
         
         # Mapear columnas
         col_mapping = self._get_excel_column_mapping(headers)
-        _logger.info(f"Mapeo de columnas: {col_mapping}")
+        _logger.info("Mapeo de columnas: %s", col_mapping)
         
         if not col_mapping:
             raise UserError(_('No se pudieron mapear las columnas del Excel. Verifique que contenga las columnas necesarias (fecha, descripción, monto, operación).'))
         
-        # Procesar datos
-        lines_created = 0
+        # Procesar datos: solo se leen las columnas hasta la última mapeada
+        last_col = max(col_mapping.values()) + 1
+        vals_list = []
+        date_format_cache = {}
         for row_num in range(header_row + 1, sheet.nrows):
-            row = sheet.row_values(row_num)
+            row = sheet.row_values(row_num, end_colx=last_col)
             if not any(cell for cell in row):
                 continue
             
             try:
-                self._create_excel_import_line(row, col_mapping, 'xlrd')
-                lines_created += 1
+                line_vals = self._build_excel_import_line_vals(row, col_mapping, 'xlrd', date_format_cache)
+                if line_vals:
+                    vals_list.append(line_vals)
             except Exception as e:
-                _logger.warning(f"Error procesando fila {row_num}: {str(e)}")
-                
-        _logger.info(f"Se crearon {lines_created} líneas desde Excel")
+                _logger.warning("Error procesando fila %s: %s", row_num, e)
+        
+        lines_created = len(self._create_import_lines(vals_list))
+        _logger.info("Se crearon %s líneas desde Excel", lines_created)
         
         if lines_created == 0:
             raise UserError(_('No se pudieron extraer datos del archivo Excel. Verifique el formato de los datos.'))
@@ -390,37 +597,19 @@ class BankImport(models.Model):
         """Mapear columnas del Excel"""
         mapping = {}
         
-        _logger.info(f"Mapeando headers: {headers}")
-        
         for i, header in enumerate(headers):
-            header_lower = header.lower().strip()
-            
-            # Mapear fecha
-            if any(word in header_lower for word in ['fecha', 'date', 'dia']):
-                mapping['date'] = i
-                _logger.info(f"Columna fecha mapeada: {i} ({header})")
-            
-            # Mapear descripción (Trans. en este caso)
-            elif any(word in header_lower for word in ['descripcion', 'concepto', 'detalle', 'description', 'memo', 'glosa', 'trans']):
-                mapping['description'] = i
-                _logger.info(f"Columna descripción mapeada: {i} ({header})")
-            
-            # Mapear cargo (débitos)
-            elif any(word in header_lower for word in ['cargo', 'debe', 'debito']):
-                mapping['cargo'] = i
-                _logger.info(f"Columna cargo mapeada: {i} ({header})")
-            
-            # Mapear abono (créditos)
-            elif any(word in header_lower for word in ['abono', 'haber', 'credito']):
-                mapping['abono'] = i
-                _logger.info(f"Columna abono mapeada: {i} ({header})")
-            
-            # Mapear número de operación/documento
-            elif any(word in header_lower for word in ['documento', 'nro', 'numero', 'referencia', 'reference', 'operation']):
-                mapping['operation'] = i
-                _logger.info(f"Columna operación mapeada: {i} ({header})")
+            roles = set()
+            for word in _HEADER_WORD_RE.findall(header.lower()):
+                role = _HEADER_KEYWORD_ROLES.get(word)
+                if role:
+                    roles.add(role)
+                else:
+                    roles.update(match.lastgroup for match in _HEADER_RE.finditer(word))
+            if roles:
+                # Un header con varias palabras clave se asigna al rol de mayor prioridad
+                mapping[next(role for role in _HEADER_ROLES if role in roles)] = i
         
-        _logger.info(f"Mapeo final: {mapping}")
+        _logger.info("Mapeo final: %s (headers: %s)", mapping, headers)
         
         # Verificar que tenemos al menos fecha
         if 'date' not in mapping:
@@ -428,51 +617,52 @@ class BankImport(models.Model):
         
         return mapping
 
-    def _create_excel_import_line(self, row, col_mapping, parser_type):
-        """Crear línea de importación desde Excel"""
+    def _build_excel_import_line_vals(self, row, col_mapping, parser_type, date_format_cache):
+        """Construir los valores de una línea de importación desde Excel
+        
+        ``date_format_cache`` guarda entre filas el formato de fecha que funcionó (ver _parse_date_str).
+        """
         try:
             # Extraer datos según el parser
             if parser_type == 'openpyxl':
-                get_value = lambda i: row[i].value if i < len(row) and row[i].value is not None else ''
+                get_value = lambda i: row[i] if i < len(row) and row[i] is not None else ''
             else:  # xlrd
                 get_value = lambda i: row[i] if i < len(row) else ''
             
-            _logger.info(f"Procesando fila con parser {parser_type}")
+            # Logs por fila solo en nivel DEBUG
+            debug = _logger.isEnabledFor(logging.DEBUG)
             
             # Fecha
             transaction_date = None
             if 'date' in col_mapping:
                 date_value = get_value(col_mapping['date'])
-                _logger.info(f"Valor fecha crudo: {date_value} (tipo: {type(date_value)})")
+                if debug:
+                    _logger.debug("Valor fecha crudo: %s (tipo: %s)", date_value, type(date_value))
                 
                 if date_value:
                     if isinstance(date_value, datetime):
                         transaction_date = date_value.date()
                     elif isinstance(date_value, str):
                         # Intentar varios formatos de fecha, incluyendo el formato con puntos
-                        for fmt in ['%Y.%m.%d', '%d/%m/%Y', '%Y-%m-%d', '%d-%m-%Y', '%m/%d/%Y']:
-                            try:
-                                transaction_date = datetime.strptime(str(date_value).strip(), fmt).date()
-                                break
-                            except:
-                                continue
+                        transaction_date = _parse_date_str(date_value, date_format_cache, col_mapping['date'])
                     # Para xlrd, a veces las fechas vienen como números
                     elif isinstance(date_value, (int, float)) and parser_type == 'xlrd':
                         try:
-                            import xlrd
                             date_tuple = xlrd.xldate_as_tuple(date_value, 0)
                             transaction_date = datetime(*date_tuple[:3]).date()
                         except:
                             pass
                             
-                _logger.info(f"Fecha procesada: {transaction_date}")
+                if debug:
+                    _logger.debug("Fecha procesada: %s", transaction_date)
             
             # Descripción
             description = ''
             if 'description' in col_mapping:
                 desc_value = get_value(col_mapping['description'])
                 description = str(desc_value) if desc_value else ''
-                _logger.info(f"Descripción: {description}")
+                if debug:
+                    _logger.debug("Descripción: %s", description)
             
             # Procesar montos - Banco de la Nación tiene columnas separadas para Cargo y Abono
             amount = 0.0
@@ -480,62 +670,62 @@ class BankImport(models.Model):
             # Procesar cargo (débito - monto negativo)
             if 'cargo' in col_mapping:
                 cargo_value = get_value(col_mapping['cargo'])
-                _logger.info(f"Valor cargo crudo: {cargo_value}")
+                if debug:
+                    _logger.debug("Valor cargo crudo: %s", cargo_value)
                 
-                if cargo_value and str(cargo_value).strip():
-                    try:
-                        # Limpiar formato de monto
-                        cargo_str = str(cargo_value).replace(',', '').replace('$', '').strip()
-                        if cargo_str and cargo_str != '':
-                            cargo_amount = float(cargo_str)
-                            amount = -abs(cargo_amount)  # Los cargos son negativos
-                            _logger.info(f"Cargo procesado: {amount}")
-                    except:
-                        pass
+                if cargo_value:
+                    cargo_amount = _cell_amount(cargo_value)
+                    if cargo_amount is not None:
+                        amount = -abs(cargo_amount)  # Los cargos son negativos
+                        if debug:
+                            _logger.debug("Cargo procesado: %s", amount)
             
             # Procesar abono (crédito - monto positivo)
             if 'abono' in col_mapping and amount == 0.0:  # Solo si no hay cargo
                 abono_value = get_value(col_mapping['abono'])
-                _logger.info(f"Valor abono crudo: {abono_value}")
+                if debug:
+                    _logger.debug("Valor abono crudo: %s", abono_value)
                 
-                if abono_value and str(abono_value).strip():
-                    try:
-                        # Limpiar formato de monto
-                        abono_str = str(abono_value).replace(',', '').replace('$', '').strip()
-                        if abono_str and abono_str != '':
-                            amount = float(abono_str)  # Los abonos son positivos
-                            _logger.info(f"Abono procesado: {amount}")
-                    except:
-                        pass
+                if abono_value:
+                    abono_amount = _cell_amount(abono_value)
+                    if abono_amount is not None:
+                        amount = abono_amount  # Los abonos son positivos
+                        if debug:
+                            _logger.debug("Abono procesado: %s", amount)
             
             # Número de operación/documento
             operation_number = ''
             if 'operation' in col_mapping:
                 op_value = get_value(col_mapping['operation'])
-                operation_number = str(op_value) if op_value else ''
-                _logger.info(f"Número de operación: {operation_number}")
+                operation_number = str(op_value).strip() if op_value else ''
+                if debug:
+                    _logger.debug("Número de operación: %s", operation_number)
             
             # Crear línea si tenemos datos mínimos
             if transaction_date or amount != 0 or operation_number:
                 line_vals = {
-                    'import_id': self.id,
                     'transaction_date': transaction_date or fields.Date.today(),
                     'description': description,
                     'amount': amount,
                     'operation_number': operation_number,
-                    'original_line': f"Excel row: {str(row)}"
+                    # Solo las columnas mapeadas, no la fila completa
+                    'original_line': json.dumps(
+                        {key: get_value(index) for key, index in col_mapping.items()},
+                        default=str, ensure_ascii=False, separators=(',', ':'),
+                    )
                 }
                 
-                _logger.info(f"Creando línea con valores: {line_vals}")
-                new_line = self.env['bank.import.line'].create(line_vals)
-                _logger.info(f"Línea creada exitosamente: ID {new_line.id}")
-            else:
-                _logger.warning("Fila descartada: no contiene datos suficientes")
+                if debug:
+                    _logger.debug("Valores de línea: %s", line_vals)
+                return line_vals
+            if debug:
+                _logger.debug("Fila descartada: no contiene datos suficientes")
+            return None
                 
         except Exception as e:
-            _logger.error(f"Error creando línea Excel: {str(e)}")
-            _logger.error(f"Datos de la fila: {row}")
-            _logger.error(f"Mapeo de columnas: {col_mapping}")
+            _logger.error("Error creando línea Excel: %s", e)
+            _logger.error("Datos de la fila: %s", row)
+            _logger.error("Mapeo de columnas: %s", col_mapping)
             raise
 
     def action_debug_excel(self):
@@ -544,7 +734,7 @@ class BankImport(models.Model):
             raise UserError(_('Debe cargar un archivo primero.'))
         
         try:
-            file_content = base64.b64decode(self.file_data)
+            file_content = self._decoded_bytes()
             
             # Información básica del archivo
             debug_info = []
@@ -554,22 +744,29 @@ class BankImport(models.Model):
             
             # Intentar con openpyxl
             try:
-                import openpyxl
-                workbook = openpyxl.load_workbook(io.BytesIO(file_content), read_only=True, data_only=True)
-                sheet = workbook.active
-                debug_info.append(f"✅ openpyxl: Hoja '{sheet.title}', {sheet.max_row} filas, {sheet.max_column} columnas")
-                
-                # Mostrar primeras 5 filas
-                for i in range(1, min(6, sheet.max_row + 1)):
-                    row_data = [str(cell.value) for cell in sheet[i]]
-                    debug_info.append(f"Fila {i}: {row_data}")
+                if openpyxl is None:
+                    raise ImportError('openpyxl no está instalado')
+                workbook = openpyxl.load_workbook(
+                    io.BytesIO(file_content), read_only=True, data_only=True, keep_links=False, keep_vba=False,
+                )
+                try:
+                    sheet = workbook.active
+                    debug_info.append(f"✅ openpyxl: Hoja '{sheet.title}', {sheet.max_row} filas, {sheet.max_column} columnas")
+                    
+                    # Mostrar primeras 5 filas
+                    for i, row in enumerate(sheet.iter_rows(min_row=1, max_row=5, values_only=True), 1):
+                        row_data = [str(value) for value in row]
+                        debug_info.append(f"Fila {i}: {row_data}")
+                finally:
+                    workbook.close()
                     
             except Exception as e:
                 debug_info.append(f"❌ openpyxl error: {str(e)}")
             
             # Intentar con xlrd
             try:
-                import xlrd
+                if xlrd is None:
+                    raise ImportError('xlrd no está instalado')
                 workbook = xlrd.open_workbook(file_contents=file_content)
                 sheet = workbook.sheet_by_index(0)
                 debug_info.append(f"✅ xlrd: Hoja '{sheet.name}', {sheet.nrows} filas, {sheet.ncols} columnas")
@@ -605,181 +802,301 @@ class BankImport(models.Model):
         if not self.line_ids:
             raise UserError(_('Debe procesar el archivo primero.'))
         
-        _logger.info(f"Iniciando búsqueda de matches para importación {self.id}")
+        _logger.info("Iniciando búsqueda de matches para importación %s", self.id)
         
         # Limpiar matches anteriores
-        self.matched_payment_ids.unlink()
+        self.matched_payment_ids.with_context(**_BULK_CTX).unlink()
         
-        total_matches = 0
-        for line in self.line_ids:
-            try:
-                matches_count = self._find_matching_payments(line)
-                total_matches += matches_count
-            except Exception as e:
-                _logger.error(f"Error procesando línea {line.id}: {str(e)}")
-                raise UserError(_('Error procesando línea de operación %s: %s') % (line.operation_number, str(e)))
+        # Las líneas se leen una sola vez como diccionarios
+        line_rows = self.line_ids.read(['operation_number', 'amount'])
+        op_fields = self._payment_operation_fields()
+        payments_by_operation = self._prefetch_payments_by_operation(line_rows, op_fields)
+        
+        # Se acumulan los emparejamientos de todas las líneas y se insertan en un solo lote;
+        # los pares (línea, pago) repetidos se descartan con un set en memoria.
+        # Las líneas se recorren por bloques: cada bloque trae sus candidatos por monto y los
+        # pagos ya leídos en bloques anteriores se reutilizan desde payment_cache
+        match_rows = []
+        seen_pairs = set()
+        unmatched_lines = []
+        payment_cache = {}
+        for block in split_every(_MATCH_BLOCK_SIZE, line_rows):
+            amount_candidates = self._fetch_amount_candidates([line['id'] for line in block], op_fields, payment_cache)
+            for line in block:
+                try:
+                    line_matches = self._find_matching_payments(line, amount_candidates, payments_by_operation)
+                except Exception as e:
+                    _logger.error("Error procesando línea %s: %s", line['id'], e)
+                    raise UserError(_('Error procesando línea de operación %s: %s') % (line['operation_number'], str(e)))
+                if not line_matches and (line['operation_number'] or '').strip():
+                    unmatched_lines.append(line)
+                for match_row in line_matches:
+                    pair = match_row[:2]
+                    if pair not in seen_pairs:
+                        seen_pairs.add(pair)
+                        match_rows.append(match_row)
+        _logger.info("Precargados %s pagos candidatos por monto", len(payment_cache))
+        
+        # Si no encontramos matches por monto, buscar solo por número de operación
+        if unmatched_lines:
+            match_rows.extend(self._find_matches_by_operation(unmatched_lines, op_fields))
+        
+        try:
+            total_matches = self._insert_matches(match_rows)
+        except Exception as e:
+            _logger.error("Error creando matches: %s", e)
+            raise UserError(_('Error creando coincidencia: %s') % str(e))
         
         self.state = 'matched'
-        _logger.info(f"Búsqueda completada. Total matches encontrados: {total_matches}")
+        _logger.info("Búsqueda completada. Total matches encontrados: %s", total_matches)
         
         # Retornar True para que se refresque la vista automáticamente
         return True
 
-    def _find_matching_payments(self, import_line):
-        """Buscar pagos que coincidan con una línea de importación"""
-        _logger.info(f"Buscando matches para línea: {import_line.id}, operación: {import_line.operation_number}, monto: {import_line.amount}")
+    @tools.ormcache()
+    def _payment_operation_fields(self):
+        """Campos de account.payment donde puede estar el número de operación, según existan en esta versión
+        
+        Solo campos almacenados, porque se usan como columnas en SQL y en los índices de init().
+        Se calcula una sola vez por worker (ormcache).
+        """
+        Payment = self.env['account.payment']
+        return tuple(
+            f for f in ('name', 'memo', 'communication', 'payment_reference')
+            if f in Payment._fields and Payment._fields[f].store
+        )
+
+    def _fetch_amount_candidates(self, line_ids, op_fields, payment_cache):
+        """Emparejar en PostgreSQL las líneas indicadas con los pagos de igual monto (±1 centavo)
         
-        # Buscar en account.payment
-        domain = [('state', 'in', ['posted', 'sent', 'in_process'])]
+        Devuelve {id_línea: (pagos_monto_exacto, pagos_con_tolerancia)}, donde cada pago es
+        el diccionario de read() con los campos de operación y el monto. ``payment_cache``
+        ({id: diccionario}) se completa con los pagos que aún no se habían leído.
+        """
+        Payment = self.env['account.payment']
+        self.env['bank.import.line'].flush_model(['import_id', 'amount'])
+        Payment.flush_model(['amount', 'state', 'company_id'])
         
-        # Buscar por monto exacto (valor absoluto)
-        amount_matches = self.env['account.payment'].search(domain + [
-            ('amount', '=', abs(import_line.amount))
-        ])
+        # SQL directo no aplica reglas de registro: se limita a las compañías del usuario
+        self.env.cr.execute("""
+            SELECT bil.id, ap.id, ROUND(ap.amount, 2) = ROUND(ABS(bil.amount)::numeric, 2)
+              FROM bank_import_line bil
+              JOIN account_payment ap
+                ON ap.amount BETWEEN ROUND(ABS(bil.amount)::numeric, 2) - %s::numeric
+                                 AND ROUND(ABS(bil.amount)::numeric, 2) + %s::numeric
+             WHERE bil.id IN %s
+               AND ap.state IN %s
+               AND ap.company_id IN %s
+        """, (_AMOUNT_TOLERANCE, _AMOUNT_TOLERANCE, tuple(line_ids), _ACTIVE_PAYMENT_STATES, tuple(self.env.companies.ids)))
+        rows = self.env.cr.fetchall()
         
-        _logger.info(f"Encontrados {len(amount_matches)} pagos con monto {abs(import_line.amount)}")
+        # Un solo read() de los pagos nuevos, con los campos usados por _check_operation_match_fast
+        payments = Payment.browse({payment_id for _line_id, payment_id, _exact in rows if payment_id not in payment_cache})
+        for row in _set_operation_values(payments.read(list(op_fields) + ['amount']), op_fields):
+            payment_cache[row['id']] = row
+        
+        amount_candidates = defaultdict(lambda: ([], []))
+        for line_id, payment_id, exact in rows:
+            amount_candidates[line_id][0 if exact else 1].append(payment_cache[payment_id])
+        return amount_candidates
+
+    def _prefetch_payments_by_operation(self, line_rows, op_fields):
+        """Cargar en una sola consulta los pagos cuyo nombre/memo/referencia es un número de operación importado"""
+        op_numbers = list({line['operation_number'] for line in line_rows if line['operation_number']})
+        payments_by_operation = defaultdict(list)
+        if not op_numbers:
+            return payments_by_operation
+        
+        payments = self.env['account.payment'].search_read(expression.AND([
+            [('state', 'in', _ACTIVE_PAYMENT_STATES)],
+            expression.OR([[(f, 'in', op_numbers)] for f in op_fields]),
+        ]), list(op_fields) + ['amount'])
+        _set_operation_values(payments, op_fields)
+        
+        op_set = set(op_numbers)
+        for payment in payments:
+            for value in {payment[f] for f in op_fields if payment[f]}:
+                if value in op_set:
+                    payments_by_operation[value].append(payment)
+        
+        _logger.info("Precargados %s pagos por número de operación", len(payments))
+        return payments_by_operation
+
+    def _find_matching_payments(self, import_line, amount_candidates, payments_by_operation):
+        """Buscar pagos que coincidan con una línea de importación (diccionario de read())
+        
+        Devuelve la lista de emparejamientos (id_línea, id_pago, tipo) sin crearlos.
+        """
+        # Logs por línea y por pago solo en nivel DEBUG
+        debug = _logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            _logger.debug("Buscando matches para línea: %s, operación: %s, monto: %s", import_line['id'], import_line['operation_number'], import_line['amount'])
+        
+        line_amount = round(abs(import_line['amount']), 2)
+        exact_amount_matches, tolerance_matches = amount_candidates.get(import_line['id'], ([], []))
+        # Número de operación normalizado una sola vez por línea
+        operation = str(import_line['operation_number'] or '').strip()
+        clean_operation = operation.lstrip('0') or '0'
+        
+        # Primero: pagos identificados directamente por número de operación, verificando el monto
+        amount_matches = [
+            payment for payment in payments_by_operation.get(import_line['operation_number'], [])
+            if round(abs(payment['amount'] - line_amount), 2) <= _AMOUNT_TOLERANCE
+        ]
+        if amount_matches:
+            if debug:
+                _logger.debug("Encontrados %s pagos por número de operación", len(amount_matches))
+        else:
+            # Buscar por monto exacto (valor absoluto)
+            amount_matches = exact_amount_matches
+            if debug:
+                _logger.debug("Encontrados %s pagos con monto %s", len(amount_matches), line_amount)
         
         # También buscar con una tolerancia mínima para errores de redondeo
         if not amount_matches:
-            tolerance = 0.01  # 1 centavo de tolerancia
-            amount_matches = self.env['account.payment'].search(domain + [
-                ('amount', '>=', abs(import_line.amount) - tolerance),
-                ('amount', '<=', abs(import_line.amount) + tolerance)
-            ])
-            _logger.info(f"Con tolerancia encontrados {len(amount_matches)} pagos")
-        
-        matches_created = 0
+            amount_matches = tolerance_matches
+            if debug:
+                _logger.debug("Con tolerancia encontrados %s pagos", len(amount_matches))
+        
+        # Los duplicados los descarta la restricción única al insertar
+        match_rows = []
         for payment in amount_matches:
-            _logger.info(f"Verificando pago {payment.id} - {payment.name}, memo: {payment.memo}")
-            
             # Verificar si el número de operación coincide en algún campo
-            operation_match = self._check_operation_match(payment, import_line.operation_number)
-            _logger.info(f"Coincidencia de operación: {operation_match}")
-            
-            # Crear match si coincide operación O si no hay número de operación
-            if operation_match or not import_line.operation_number:
-                # Verificar si ya existe este match para evitar duplicados
-                existing_match = self.env['bank.import.match'].search([
-                    ('import_id', '=', self.id),
-                    ('payment_id', '=', payment.id),
-                    ('import_line_id', '=', import_line.id)
-                ])
-                
-                if not existing_match:
-                    try:
-                        match_vals = {
-                            'import_id': self.id,
-                            'import_line_id': import_line.id,
-                            'payment_id': payment.id,
-                            'match_type': 'exact' if operation_match else 'partial'
-                        }
-                        _logger.info(f"Creando match con valores: {match_vals}")
-                        
-                        new_match = self.env['bank.import.match'].create(match_vals)
-                        matches_created += 1
-                        _logger.info(f"Match creado exitosamente: {new_match.id}")
-                    except Exception as e:
-                        _logger.error(f"Error creando match: {str(e)}")
-                        raise UserError(_('Error creando coincidencia: %s') % str(e))
+            operation_match = bool(operation) and self._check_operation_match_fast(payment, operation, clean_operation)
+            if debug:
+                _logger.debug("Pago %s - %s, memo: %s, coincidencia de operación: %s", payment['id'], payment['name'], payment.get('memo'), operation_match)
+            
+            # Crear match si coincide operación O si no hay número de operación (solo espacios
+            # cuenta como sin número): en ese caso el emparejamiento es solo por monto, parcial
+            if operation_match or not operation:
+                match_rows.append((import_line['id'], payment['id'], 'exact' if operation_match else 'partial'))
         
-        # Si no encontramos matches por monto, buscar solo por número de operación
-        if matches_created == 0 and import_line.operation_number:
-            _logger.info("Buscando matches solo por número de operación")
-            all_payments = self.env['account.payment'].search(domain)
-            for payment in all_payments:
-                if self._check_operation_match(payment, import_line.operation_number):
-                    existing_match = self.env['bank.import.match'].search([
-                        ('import_id', '=', self.id),
-                        ('payment_id', '=', payment.id),
-                        ('import_line_id', '=', import_line.id)
-                    ])
-                    
-                    if not existing_match:
-                        try:
-                            match_vals = {
-                                'import_id': self.id,
-                                'import_line_id': import_line.id,
-                                'payment_id': payment.id,
-                                'match_type': 'partial'
-                            }
-                            new_match = self.env['bank.import.match'].create(match_vals)
-                            matches_created += 1
-                            _logger.info(f"Match parcial creado: {new_match.id}")
-                        except Exception as e:
-                            _logger.error(f"Error creando match parcial: {str(e)}")
-        
-        _logger.info(f"Total de matches creados para línea {import_line.id}: {matches_created}")
-        return matches_created
-
-    def _check_operation_match(self, payment, operation_number):
-        """Verificar si el número de operación coincide"""
-        if not operation_number:
-            return True  # Si no hay número de operación, considerar match por monto
-        
-        # Limpiar el número de operación (remover ceros a la izquierda y espacios)
-        clean_operation = str(operation_number).strip().lstrip('0') or '0'
-        
-        # Campos donde puede estar el número de operación en account.payment
-        fields_to_check = [
-            payment.name,  # Número/referencia del pago
-            payment.memo,  # Campo memo (donde está el número de operación)
+        if debug:
+            _logger.debug("Total de matches encontrados para línea %s: %s", import_line['id'], len(match_rows))
+        return match_rows
+
+    def _find_matches_by_operation(self, import_lines, op_fields):
+        """Emparejar solo por número de operación las líneas que no coincidieron por monto
+        
+        Una sola consulta resuelve todas las líneas: el número de operación (o su forma sin
+        ceros a la izquierda) debe estar contenido en alguno de los campos de operación del
+        pago, lo que incluye la coincidencia BCP por últimos 6 dígitos.
+        """
+        _logger.info("Buscando matches solo por número de operación para %s líneas", len(import_lines))
+        # Cada patrón distinto se busca una sola vez y luego se reparte entre sus líneas.
+        # La forma sin ceros a la izquierda está contenida en el número completo, así que
+        # basta con buscarla; un número formado solo por ceros se busca tal cual.
+        # Un número vacío o de solo espacios sería ILIKE '%%' y coincidiría con todos los pagos
+        lines_by_pattern = defaultdict(list)
+        for import_line in import_lines:
+            operation = str(import_line['operation_number'] or '').strip()
+            if operation:
+                lines_by_pattern[operation.lstrip('0') or operation].append(import_line['id'])
+        if not lines_by_pattern:
+            return []
+        patterns = list(lines_by_pattern)
+        
+        self.env['account.payment'].flush_model(list(op_fields) + ['state', 'company_id'])
+        field_match = ' OR '.join(f'ap.{field} ILIKE v.op_like' for field in op_fields)
+        self.env.cr.execute(f"""
+            SELECT DISTINCT v.idx, ap.id
+              FROM unnest(%s::text[]) WITH ORDINALITY AS v(op_like, idx)
+              JOIN account_payment ap ON ({field_match})
+             WHERE ap.state IN %s
+               AND ap.company_id IN %s
+        """, ([f'%{_escape_like(pattern)}%' for pattern in patterns], _ACTIVE_PAYMENT_STATES, tuple(self.env.companies.ids)))
+        
+        return [
+            (line_id, payment_id, 'partial')
+            for idx, payment_id in self.env.cr.fetchall()
+            for line_id in lines_by_pattern[patterns[idx - 1]]
         ]
+
+    def _insert_matches(self, match_rows):
+        """Crear los emparejamientos (id_línea, id_pago, tipo) y devolver cuántos se crearon
         
-        # Verificar también en el campo communication si existe
-        if hasattr(payment, 'communication') and payment.communication:
-            fields_to_check.append(payment.communication)
-            
-        # Verificar en payment_reference si existe
-        if hasattr(payment, 'payment_reference') and payment.payment_reference:
-            fields_to_check.append(payment.payment_reference)
+        Los lotes pequeños pasan por el ORM; a partir de _MATCH_SQL_THRESHOLD se insertan
+        con SQL directo (_bulk_create_matches).
+        """
+        if not match_rows:
+            return 0
+        if len(match_rows) > _MATCH_SQL_THRESHOLD:
+            return self._bulk_create_matches(match_rows)
         
-        for field_value in fields_to_check:
-            if field_value:
-                field_str = str(field_value).strip()
-                
-                # Buscar coincidencia exacta
-                if operation_number in field_str:
-                    return True
-                    
-                # Buscar coincidencia sin ceros a la izquierda
-                if clean_operation != '0' and clean_operation in field_str:
-                    return True
-                    
-                # Buscar si el campo contiene el número sin ceros a la izquierda
-                clean_field = field_str.lstrip('0') or '0'
-                if clean_operation == clean_field:
-                    return True
-                
-                # Para BCP: También buscar por los últimos 6 dígitos del campo del pago
-                if len(field_str) >= 6:
-                    last_6_digits = field_str[-6:]
-                    if operation_number == last_6_digits or clean_operation == last_6_digits.lstrip('0'):
-                        _logger.info(f"Coincidencia BCP por últimos 6 dígitos: {operation_number} == {last_6_digits}")
-                        return True
+        return len(self.env['bank.import.match'].with_context(**_BULK_CTX).create([{
+            'import_id': self.id,
+            'import_line_id': line_id,
+            'payment_id': payment_id,
+            'match_type': match_type,
+        } for line_id, payment_id, match_type in match_rows]))
+
+    def _bulk_create_matches(self, match_rows):
+        """Insertar en bloque emparejamientos (id_línea, id_pago, tipo), ignorando duplicados
+        
+        Los campos related almacenados de bank.import.match se llenan en el mismo INSERT
+        a partir de la línea. Devuelve la cantidad de filas insertadas.
+        """
+        for model in ('bank.import.line', 'bank.import.match'):
+            self.env[model].flush_model()
         
-        # Si no hay coincidencia exacta, permitir match solo por monto
-        return False
+        inserted = execute_values(self.env.cr._obj, """
+            INSERT INTO bank_import_match (
+                import_id, import_line_id, payment_id, match_type,
+                transaction_date, operation_number, amount,
+                create_uid, create_date, write_uid, write_date
+            )
+            SELECT v.import_id, v.line_id, v.payment_id, v.match_type,
+                   bil.transaction_date, bil.operation_number, bil.amount,
+                   v.uid, NOW() AT TIME ZONE 'UTC', v.uid, NOW() AT TIME ZONE 'UTC'
+              FROM (VALUES %s) AS v(import_id, line_id, payment_id, match_type, uid)
+              JOIN bank_import_line bil ON bil.id = v.line_id
+            ON CONFLICT (import_id, payment_id, import_line_id) DO NOTHING
+            RETURNING id
+        """, [(self.id, line_id, payment_id, match_type, self.env.uid) for line_id, payment_id, match_type in match_rows], fetch=True)
+        
+        # El INSERT no pasa por el ORM: invalidar la caché de emparejamientos y recalcular is_matched
+        self.env['bank.import.match'].invalidate_model()
+        self.env['bank.import'].invalidate_model(['matched_payment_ids'])
+        self.env.add_to_compute(self.env['bank.import.line']._fields['is_matched'], self.line_ids)
+        return len(inserted)
+
+    def _check_operation_match_fast(self, payment, operation_number, clean_operation):
+        """Verificar si el número de operación coincide
+        
+        ``payment`` es el pago leído y normalizado por _set_operation_values, y
+        ``operation_number``/``clean_operation`` el número de la línea sin espacios y
+        sin ceros a la izquierda, calculados una vez por línea.
+        """
+        # Igual al campo sin ceros a la izquierda o a sus últimos 6 dígitos (BCP)
+        keys = payment['op_keys']
+        if operation_number in keys or clean_operation in keys:
+            return True
+        
+        # Contenido en algún campo; el número sin ceros está contenido en el completo,
+        # salvo si está formado solo por ceros
+        needle = clean_operation if clean_operation != '0' else operation_number
+        # Una sola búsqueda en C sobre el texto unido en lugar de un generador por campo
+        return needle in payment['op_text']
 
     def _parse_continental_excel_openpyxl(self, sheet):
         """Parsear Excel Continental con openpyxl"""
         _logger.info("Procesando Continental con openpyxl...")
         
-        # Buscar la fila de headers
+        # Buscar la fila de headers en una sola pasada; la fila encontrada se reutiliza como headers
         header_row = None
-        for row_num in range(1, min(5, sheet.max_row + 1)):
-            row = sheet[row_num]
-            row_str = ' '.join([str(cell.value) for cell in row if cell.value]).upper()
+        headers = []
+        for row_num, row in enumerate(sheet.iter_rows(min_row=1, max_row=4, values_only=True), 1):
+            row_str = ' '.join([str(value) for value in row if value]).upper()
             if 'FECHA OPER' in row_str and 'CARGO' in row_str:
                 header_row = row_num
-                _logger.info(f"Header Continental encontrado en fila {row_num}")
+                headers = [str(value) if value else '' for value in row]
+                _logger.info("Header Continental encontrado en fila %s", row_num)
                 break
         
         if header_row is None:
             raise UserError(_('No se encontró el formato de Banco Continental. Verifique las columnas FECHA OPER., N OPER., CARGO/ABONO.'))
         
-        # Obtener headers y mapear columnas
-        headers = [str(cell.value) if cell.value else '' for cell in sheet[header_row]]
-        _logger.info(f"Headers Continental: {headers}")
+        _logger.info("Headers Continental: %s", headers)
         
         # Mapear columnas específicas del Continental
         col_mapping = {}
@@ -794,63 +1111,70 @@ class BankImport(models.Model):
             elif 'CARGO/ABONO' in header_str:
                 col_mapping['monto'] = i
         
-        _logger.info(f"Mapeo Continental openpyxl: {col_mapping}")
+        _logger.info("Mapeo Continental openpyxl: %s", col_mapping)
         
         if not all(key in col_mapping for key in ['fecha', 'monto']):
             raise UserError(_('No se encontraron las columnas necesarias en el archivo Continental.'))
         
-        # Procesar transacciones
-        lines_created = 0
-        for row_num in range(header_row + 1, sheet.max_row + 1):
-            row = sheet[row_num]
-            if not any(cell.value for cell in row):
+        # Índices de columna como locales; None si la columna no existe
+        i_fecha = col_mapping['fecha']
+        i_desc = col_mapping.get('descripcion')
+        i_op = col_mapping.get('operacion')
+        i_monto = col_mapping['monto']
+        last_col = max(col_mapping.values()) + 1
+        
+        # Procesar transacciones: en modo read_only sheet[n] vuelve a leer la hoja desde el
+        # principio en cada fila, iter_rows la recorre una sola vez y entrega solo valores
+        # Los valores de cada fila van directo al diccionario de create, sin objetos intermedios;
+        # la fecha por defecto y el momento de referencia del año se calculan una sola vez
+        vals_list = []
+        today = fields.Date.today()
+        now = datetime.now()
+        skipped_rows = 0
+        for row in sheet.iter_rows(min_row=header_row + 1, max_col=last_col, values_only=True):
+            if not any(row):
                 continue
             
-            try:
-                # Saltar "SALDO ANTERIOR"
-                if col_mapping.get('descripcion'):
-                    desc_cell = row[col_mapping['descripcion']]
-                    desc = str(desc_cell.value).strip().upper() if desc_cell.value else ''
-                    if 'SALDO ANTERIOR' in desc:
-                        continue
-                
-                # Procesar fecha
-                fecha_cell = row[col_mapping['fecha']] if col_mapping.get('fecha') else None
-                fecha_str = str(fecha_cell.value).strip() if fecha_cell and fecha_cell.value else ''
-                transaction_date = self._parse_continental_date(fecha_str)
-                
-                # Procesar descripción
-                desc_cell = row[col_mapping['descripcion']] if col_mapping.get('descripcion') else None
-                description = str(desc_cell.value).strip() if desc_cell and desc_cell.value else ''
-                
-                # Procesar monto
-                monto_cell = row[col_mapping['monto']] if col_mapping.get('monto') else None
-                monto_str = str(monto_cell.value).strip() if monto_cell and monto_cell.value else '0'
-                amount = self._parse_continental_amount(monto_str)
-                
-                # Procesar número de operación
-                op_cell = row[col_mapping['operacion']] if col_mapping.get('operacion') else None
-                operation_number = str(op_cell.value).strip() if op_cell and op_cell.value else ''
-                
-                # Solo crear si tenemos datos válidos
-                if (transaction_date or amount != 0 or operation_number) and description:
-                    line_vals = {
-                        'import_id': self.id,
-                        'transaction_date': transaction_date or fields.Date.today(),
-                        'description': description,
-                        'amount': amount,
-                        'operation_number': operation_number,
-                        'original_line': f"Continental: {fecha_str} | {description} | {monto_str} | {operation_number}"
-                    }
-                    
-                    self.env['bank.import.line'].create(line_vals)
-                    lines_created += 1
-                    _logger.info(f"Continental openpyxl creada: {description[:30]}... - {amount} - Op: {operation_number}")
-                    
-            except Exception as e:
-                _logger.warning(f"Error procesando fila Continental openpyxl {row_num}: {str(e)}")
+            # Validación anticipada: sin descripción o con "SALDO ANTERIOR" la fila se descarta
+            # antes de convertir el resto de celdas. Los parsers de fecha y monto devuelven
+            # None/0.0 ante valores inválidos, así que no hace falta try/except por fila
+            desc_value = row[i_desc] if i_desc is not None else None
+            description = str(desc_value).strip() if desc_value else ''
+            if not description or 'SALDO ANTERIOR' in description.upper():
+                skipped_rows += 1
+                continue
+            
+            # Procesar fecha
+            fecha_value = row[i_fecha]
+            fecha_str = str(fecha_value).strip() if fecha_value else ''
+            transaction_date = self._parse_continental_date(fecha_str, now)
+            
+            # Procesar monto
+            monto_value = row[i_monto]
+            monto_str = str(monto_value).strip() if monto_value else '0'
+            amount = self._parse_continental_amount(monto_value)
+            
+            # Procesar número de operación
+            op_value = row[i_op] if i_op is not None else None
+            operation_number = str(op_value).strip() if op_value else ''
+            
+            # Solo crear si tenemos datos válidos
+            if not (transaction_date or amount != 0 or operation_number):
+                skipped_rows += 1
+                continue
+            
+            vals_list.append({
+                'transaction_date': transaction_date or today,
+                'description': description,
+                'amount': amount,
+                'operation_number': operation_number,
+                'original_line': f"Continental: {fecha_str} | {description} | {monto_str} | {operation_number}"
+            })
         
-        _logger.info(f"Se crearon {lines_created} líneas desde Continental openpyxl")
+        if skipped_rows:
+            _logger.info("Continental openpyxl: %s filas omitidas sin datos válidos", skipped_rows)
+        lines_created = len(self._create_import_lines(vals_list))
+        _logger.info("Se crearon %s líneas desde Continental openpyxl", lines_created)
         
         if lines_created == 0:
             raise UserError(_('No se pudieron extraer transacciones válidas del archivo Continental.'))
@@ -861,78 +1185,57 @@ class BankImport(models.Model):
             return []
         return [item.strip() for item in str(column_data).split('\n') if item.strip()]
 
-    def _parse_continental_date(self, date_str):
-        """Parsear fecha del formato Continental (DD-MM)"""
-        if not date_str or str(date_str).strip() == '':
+    def _parse_continental_date(self, date_str, now=None):
+        """Parsear fecha del formato Continental (DD-MM)
+        
+        Una expresión regular y date() directo en lugar de split/isdigit y strptime por formato.
+        ``now`` es el momento de referencia para completar el año; el parser lo toma una vez
+        por archivo y lo pasa en cada fila.
+        """
+        if not date_str:
             return None
         
+        date_str = str(date_str).strip()
+        match = _CONTINENTAL_DATE_RE.fullmatch(date_str)
         try:
-            date_str = str(date_str).strip()
-            current_year = datetime.now().year
-            
-            _logger.info(f"Parseando fecha Continental: '{date_str}'")
-            
-            # Si la fecha está en formato DD-MM (como 27-08), agregar año actual
-            if '-' in date_str:
-                parts = date_str.split('-')
-                if len(parts) == 2:
-                    day_str, month_str = parts
-                    day = day_str.strip()
-                    month = month_str.strip()
-                    
-                    # Validar que son números
-                    if day.isdigit() and month.isdigit():
-                        day_int = int(day)
-                        month_int = int(month)
-                        
-                        # Validar rangos
-                        if 1 <= day_int <= 31 and 1 <= month_int <= 12:
-                            # Si estamos en enero-febrero y la fecha es noviembre-diciembre, usar año anterior
-                            if datetime.now().month <= 2 and month_int >= 11:
-                                current_year -= 1
-                            
-                            result = datetime(current_year, month_int, day_int).date()
-                            _logger.info(f"Fecha parseada: {date_str} -> {result}")
-                            return result
-            
-            # Si no es formato DD-MM, intentar otros formatos
-            for fmt in ['%d/%m/%Y', '%d-%m-%Y', '%Y-%m-%d']:
-                try:
-                    result = datetime.strptime(date_str, fmt).date()
-                    _logger.info(f"Fecha parseada con formato {fmt}: {date_str} -> {result}")
-                    return result
-                except:
-                    continue
-                    
-            _logger.warning(f"No se pudo parsear fecha Continental: {date_str}")
-            return None
+            if match:
+                day, month, year = match.groups()
+                month = int(month)
+                if year:
+                    year = int(year)
+                    if year < 100:
+                        year += 2000
+                else:
+                    # Sin año (como 27-08): año actual, o el anterior si estamos en
+                    # enero-febrero y la fecha es de noviembre-diciembre
+                    now = now or datetime.now()
+                    year = now.year - 1 if now.month <= 2 and month >= 11 else now.year
+                return date(year, month, int(day))
             
-        except Exception as e:
-            _logger.warning(f"Error parseando fecha Continental '{date_str}': {str(e)}")
-            return None
+            match = _CONTINENTAL_ISO_DATE_RE.fullmatch(date_str)
+            if match:
+                year, month, day = match.groups()
+                return date(int(year), int(month), int(day))
+        except ValueError:
+            pass
+        
+        _logger.warning("No se pudo parsear fecha Continental: %s", date_str)
+        return None
 
     def _parse_continental_amount(self, amount_str):
-        """Parsear monto del formato Continental"""
+        """Parsear monto del formato Continental
+        
+        Acepta el valor de la celda: los números se usan tal cual y el texto se limpia con
+        un solo translate (_cell_amount).
+        """
         if not amount_str:
             return 0.0
         
-        try:
-            # Limpiar el formato: remover comas, espacios extra
-            clean_amount = str(amount_str).replace(',', '').replace(' ', '').strip()
-            
-            _logger.info(f"Parseando monto Continental: '{amount_str}' -> '{clean_amount}'")
-            
-            # Manejar casos vacíos
-            if not clean_amount or clean_amount == '':
-                return 0.0
-                
-            result = float(clean_amount)
-            _logger.info(f"Monto parseado: {amount_str} -> {result}")
-            return result
-            
-        except Exception as e:
-            _logger.warning(f"No se pudo parsear monto Continental '{amount_str}': {str(e)}")
+        amount = _cell_amount(amount_str)
+        if amount is None:
+            _logger.warning("No se pudo parsear monto Continental '%s'", amount_str)
             return 0.0
+        return amount
 
 class BankImportLine(models.Model):
     _name = 'bank.import.line'
@@ -944,14 +1247,23 @@ class BankImportLine(models.Model):
     amount = fields.Float('Monto', digits=(16, 2))
     operation_number = fields.Char('Número de Operación')
     original_line = fields.Text('Línea Original')
-    is_matched = fields.Boolean('Emparejado', compute='_compute_is_matched')
+    is_matched = fields.Boolean('Emparejado', compute='_compute_is_matched', store=True, index=True)
 
-    @api.depends('import_id.matched_payment_ids')
+    @api.depends('import_id.matched_payment_ids.import_line_id')
     def _compute_is_matched(self):
+        # Una sola consulta EXISTS para todas las líneas; ningún emparejamiento sale de la base
+        line_ids = tuple(id_ for id_ in self._origin.ids if id_)
+        flags = {}
+        if line_ids:
+            self.env['bank.import.match'].flush_model(['import_line_id'])
+            self.env.cr.execute("""
+                SELECT l.id, EXISTS(SELECT 1 FROM bank_import_match m WHERE m.import_line_id = l.id)
+                  FROM bank_import_line l
+                 WHERE l.id IN %s
+            """, (line_ids,))
+            flags = dict(self.env.cr.fetchall())
         for record in self:
-            record.is_matched = bool(record.import_id.matched_payment_ids.filtered(
-                lambda m: m.import_line_id.id == record.id
-            ))
+            record.is_matched = flags.get(record._origin.id, False)
 
 
 class BankImportMatch(models.Model):
@@ -959,31 +1271,24 @@ class BankImportMatch(models.Model):
     _description = 'Emparejamiento de Pagos'
 
     import_id = fields.Many2one('bank.import', string='Importación', required=True, ondelete='cascade')
-    import_line_id = fields.Many2one('bank.import.line', string='Línea de Importación', required=True, ondelete='cascade')
-    payment_id = fields.Many2one('account.payment', string='Pago', required=True)
+    import_line_id = fields.Many2one('bank.import.line', string='Línea de Importación', required=True, ondelete='cascade', index=True, auto_join=True)
+    payment_id = fields.Many2one('account.payment', string='Pago', required=True, ondelete='cascade')
     match_type = fields.Selection([
         ('exact', 'Exacto'),
         ('partial', 'Parcial')
     ], string='Tipo de Coincidencia', default='exact')
     
-    # Campos relacionados para mostrar información
+    # Campos relacionados para mostrar información: los de la línea no cambian y se
+    # almacenan para ordenar; los del pago solo se muestran y se leen del pago
     transaction_date = fields.Date(related='import_line_id.transaction_date', store=True)
     operation_number = fields.Char(related='import_line_id.operation_number', store=True)
     amount = fields.Float(related='import_line_id.amount', store=True)
-    payment_amount = fields.Monetary(related='payment_id.amount', store=True, currency_field='currency_id')
-    currency_id = fields.Many2one(related='payment_id.currency_id', store=True)
-    payment_reference = fields.Char(related='payment_id.name', store=True, string='Referencia de Pago')
-    payment_memo = fields.Char(related='payment_id.memo', store=True, string='Memo del Pago')
-    partner_name = fields.Char(related='payment_id.partner_id.name', store=True)
-
-    @api.model
-    def create(self, vals):
-        """Validar campos obligatorios antes de crear"""
-        if not vals.get('import_line_id'):
-            raise UserError(_('El campo "Línea de Importación" es obligatorio.'))
-        if not vals.get('payment_id'):
-            raise UserError(_('El campo "Pago" es obligatorio.'))
-        if not vals.get('import_id'):
-            raise UserError(_('El campo "Importación" es obligatorio.'))
-            
-        return super().create(vals)
\ No newline at end of file
+    payment_amount = fields.Monetary(related='payment_id.amount', currency_field='currency_id')
+    currency_id = fields.Many2one(related='payment_id.currency_id')
+    payment_reference = fields.Char(related='payment_id.name', string='Referencia de Pago')
+    payment_memo = fields.Char(related='payment_id.memo', string='Memo del Pago')
+    partner_name = fields.Char(related='payment_id.partner_id.name')
+
+    _sql_constraints = [
+        ('uniq_match', 'unique(import_id, payment_id, import_line_id)', 'El pago ya está emparejado con esta línea de importación.'),
+    ]
\ No newline at end of file
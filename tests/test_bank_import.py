@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestBankImportOperationNumber(TransactionCase):
+
+    def test_excel_whitespace_operation_is_empty(self):
+        """Una celda de operación con solo espacios se guarda como sin número de operación"""
+        col_mapping = {'date': 0, 'description': 1, 'abono': 2, 'operation': 3}
+        vals = self.env['bank.import']._build_excel_import_line_vals(
+            ('01/02/2024', 'Depósito', 150.0, '   '), col_mapping, 'openpyxl', {},
+        )
+        self.assertEqual(vals['operation_number'], '')
+
+    def test_whitespace_operation_matches_as_partial(self):
+        """Sin número de operación los candidatos por monto son emparejamientos parciales"""
+        payment = {'id': 7, 'amount': 150.0, 'name': 'PBNK1/2024/00001', 'op_keys': set(), 'op_text': ''}
+        line = {'id': 3, 'operation_number': '   ', 'amount': 150.0}
+        match_rows = self.env['bank.import']._find_matching_payments(line, {3: ([payment], [])}, {})
+        self.assertEqual(match_rows, [(3, 7, 'partial')])
+
+    def test_whitespace_operation_not_searched_by_operation(self):
+        """Una línea sin número de operación no se busca solo por operación (sería ILIKE '%%')"""
+        match_rows = self.env['bank.import']._find_matches_by_operation(
+            [{'id': 3, 'operation_number': '   ', 'amount': 150.0}],
+            self.env['bank.import']._payment_operation_fields(),
+        )
+        self.assertEqual(match_rows, [])